@@ -1,8 +1,16 @@
 """Display helpers for the ISS Daily Reports Chatbot (dark mode optimized)."""
 
 from IPython.display import display, Markdown, HTML
+import html
 import json
 
+# HTML fragments used when formatting assistant messages
+_UL_OPEN = '<ul style="margin: 8px 0; padding-left: 20px;">'
+_UL_CLOSE = '</ul>'
+_LI_OPEN = '<li style="margin: 4px 0;">'
+_LI_CLOSE = '</li>'
+_BR = '<br>'
+
 
 def show_welcome():
     """Display welcome message."""
@@ -35,37 +43,35 @@ def show_user_message(message: str):
 
 def show_assistant_message(message: str):
     """Display assistant message with proper formatting."""
-    import html as html_module
-    import re
-    
     # Escape HTML first
-    safe_message = html_module.escape(message)
+    safe_message = html.escape(message)
     
     # Convert markdown-style lists to HTML
-    lines = safe_message.split('\n')
-    formatted_lines = []
+    out = []
+    append = out.append
     in_list = False
     
-    for line in lines:
+    for line in safe_message.split('\n'):
         stripped = line.strip()
         if stripped.startswith('- '):
             if not in_list:
-                formatted_lines.append('<ul style="margin: 8px 0; padding-left: 20px;">')
+                append(_UL_OPEN)
                 in_list = True
-            formatted_lines.append(f'<li style="margin: 4px 0;">{stripped[2:]}</li>')
+            append(_LI_OPEN)
+            append(stripped[2:])
+            append(_LI_CLOSE)
         else:
             if in_list:
-                formatted_lines.append('</ul>')
+                append(_UL_CLOSE)
                 in_list = False
             if stripped:
-                formatted_lines.append(f'{stripped}<br>')
-            else:
-                formatted_lines.append('<br>')
+                append(stripped)
+            append(_BR)
     
     if in_list:
-        formatted_lines.append('</ul>')
+        append(_UL_CLOSE)
     
-    formatted_message = '\n'.join(formatted_lines)
+    formatted_message = ''.join(out)
     
     display(HTML(f"""
 <div style="background: rgba(156, 39, 176, 0.15); padding: 12px; border-radius: 8px; margin: 8px 0; border-left: 4px solid #BA68C8;">
@@ -77,18 +83,24 @@ def show_assistant_message(message: str):
 
 def show_function_call(name: str, arguments: dict):
     """Display function call being executed."""
-    args_str = json.dumps(arguments) if arguments else "{}"
+    if not arguments:
+        args_str = ""
+    elif len(arguments) <= 3 and all(isinstance(v, (str, int, float, bool)) for v in arguments.values()):
+        # Common case (one or two scalar args): show as keyword arguments
+        args_str = ", ".join(f"{k}={v!r}" for k, v in arguments.items())
+    else:
+        args_str = json.dumps(arguments)
+    args_str = html.escape(args_str)
     display(HTML(f"""
 <div style="background: rgba(255, 152, 0, 0.2); padding: 10px 14px; border-radius: 6px; margin: 8px 0; border-left: 4px solid #FF9800;">
     <span style="color: #FFB74D; font-weight: 600;">Calling:</span>
-    <code style="color: #FF9800; margin-left: 8px;">{name}({args_str})</code>
+    <code style="color: #FF9800; margin-left: 8px;">{html.escape(name)}({args_str})</code>
 </div>
 """))
 
 
 def show_function_result_preview(result: str, max_length: int = 300):
     """Display a preview of function result."""
-    import html
     preview = result[:max_length] + "..." if len(result) > max_length else result
     preview = html.escape(preview)
     display(HTML(f"""
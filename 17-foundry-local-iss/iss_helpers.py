@@ -7,17 +7,111 @@ Data available from March 2013 to July 29, 2024 (when the blog was discontinued)
 Source: https://www.nasa.gov/blogs/stationreport/
 """
 
+import codecs
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
-import urllib.request
-import urllib.error
+from functools import lru_cache
+from html.parser import HTMLParser
+from typing import Optional, Tuple
+
+import urllib3
 
 
 # NASA ISS Daily Summary Report blog was active from March 2013 to July 29, 2024
 DATA_START_DATE = "2013-03-01"
 DATA_END_DATE = "2024-07-29"
+_START_DT = datetime.fromisoformat(DATA_START_DATE)
+_END_DT = datetime.fromisoformat(DATA_END_DATE)
+
+# Shared HTTP pool so repeated report fetches reuse TCP/TLS connections to nasa.gov
+# (sized to the number of concurrent fetch workers)
+_MAX_FETCH_WORKERS = 8
+_STREAM_CHUNK_SIZE = 8192
+_HTTP = urllib3.PoolManager(
+    num_pools=4,
+    maxsize=_MAX_FETCH_WORKERS,
+    retries=urllib3.Retry(connect=2, read=2, redirect=5, backoff_factor=0.3),
+    timeout=urllib3.Timeout(connect=5, read=15),
+    headers={'User-Agent': 'Mozilla/5.0 (compatible; ISS-Chatbot/1.0)'},
+)
+
+# Precompiled patterns for text cleanup and response parsing
+_RE_MULTINL = re.compile(r'\n\s*\n\s*\n+')
+_RE_MULTISPACE = re.compile(r'  +')
+# Section headers and the markers that end a section. Headers are matched by
+# lookahead and only their fixed stem is consumed, so a header never hides a
+# marker or another header that overlaps it.
+_RE_SECTION = re.compile(
+    r"(?=(?P<payloads>Payloads?:?\s*))Payload"
+    r"|(?=(?P<systems>Systems?(?P<colon>:?)\s*))System"
+    r"|Look Ahead|Today's|Completed|\n## ",
+    re.IGNORECASE,
+)
+_SECTION_LIMITS = {'payloads': 2500, 'systems': 1500}
+_RE_FUNCTOOLS = re.compile(r'functools\[')
+_JSON_DECODER = json.JSONDecoder()
+
+# Page regions that carry no report content
+_SKIP_TAGS = frozenset({'script', 'style', 'nav', 'header', 'footer'})
+_HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+
+# Keep the report text plain ASCII for typographic characters NASA uses often
+_ASCII_PUNCTUATION = str.maketrans({
+    '\xa0': ' ',
+    '\u2019': "'",
+    '\u2013': '-',
+    '\u201c': '"',
+    '\u201d': '"',
+})
+
+
+class _ReportParser(HTMLParser):
+    """Single-pass HTML to text converter for NASA blog pages."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks = []
+        self.title = None
+        self._title_chunks = None
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'h1' and self.title is None and self._title_chunks is None:
+            self._title_chunks = []
+
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif self._skip_depth:
+            return
+        elif tag in _HEADING_TAGS:
+            self.chunks.append('\n## ')
+        elif tag == 'li':
+            self.chunks.append('\n- ')
+        elif tag == 'br':
+            self.chunks.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag == 'h1' and self._title_chunks is not None:
+            self.title = ''.join(self._title_chunks).strip() or None
+            self._title_chunks = None
+
+        if tag in _SKIP_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+        elif self._skip_depth:
+            return
+        elif tag == 'p':
+            self.chunks.append('\n\n')
+        elif tag in _HEADING_TAGS:
+            self.chunks.append('\n')
+
+    def handle_data(self, data):
+        if self._title_chunks is not None:
+            self._title_chunks.append(data)
+        if not self._skip_depth:
+            self.chunks.append(data)
 
 
 def _build_nasa_url(date: str) -> str:
@@ -37,72 +131,57 @@ def _build_nasa_url(date: str) -> str:
     return url
 
 
-def _fetch_url(url: str, timeout: int = 15) -> Optional[str]:
-    """Fetch content from a URL."""
+class _ReportUnavailable(Exception):
+    """NASA could not be reached or returned an error (transient, never cached)."""
+
+
+def _fetch_report_page(url: str) -> Tuple[int, Optional[_ReportParser]]:
+    """
+    Stream a report page over the shared connection pool straight into a _ReportParser.
+    Returns (status, parser); status is 0 if the server could not be reached
+    and parser is None for any non-success response.
+    """
     try:
-        req = urllib.request.Request(
-            url,
-            headers={'User-Agent': 'Mozilla/5.0 (compatible; ISS-Chatbot/1.0)'}
-        )
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            return response.read().decode('utf-8')
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
-            return None
-        raise
-    except urllib.error.URLError:
-        return None
-    except Exception:
-        return None
+        response = _HTTP.request('GET', url, preload_content=False)
+    except urllib3.exceptions.HTTPError:
+        return 0, None
+    
+    try:
+        if response.status >= 400:
+            response.drain_conn()
+            return response.status, None
+        
+        # Incremental decoding keeps multi-byte characters split across chunks intact
+        parser = _ReportParser()
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        for chunk in response.stream(_STREAM_CHUNK_SIZE):
+            parser.feed(decoder.decode(chunk))
+        parser.feed(decoder.decode(b'', final=True))
+        parser.close()
+        return response.status, parser
+    except urllib3.exceptions.HTTPError:
+        return 0, None
+    finally:
+        response.release_conn()
 
 
-def _parse_report_content(html: str) -> dict:
+def _parse_report_content(parser: _ReportParser) -> dict:
     """
-    Parse the NASA blog HTML to extract report content.
+    Extract report content from a NASA blog page that was fed to a _ReportParser.
     Returns a simplified dict with the key information.
     """
     content = {}
     
-    # Extract title
-    title_match = re.search(r'<h1[^>]*>([^<]+)</h1>', html)
-    if title_match:
-        content['title'] = title_match.group(1).strip()
+    if parser.title:
+        content['title'] = parser.title.translate(_ASCII_PUNCTUATION)
     
-    # Clean up HTML to extract text
-    text = html
-    
-    # Remove script and style tags
-    text = re.sub(r'<script[^>]*>.*?</script>', '', text, flags=re.DOTALL)
-    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL)
-    text = re.sub(r'<nav[^>]*>.*?</nav>', '', text, flags=re.DOTALL)
-    text = re.sub(r'<header[^>]*>.*?</header>', '', text, flags=re.DOTALL)
-    text = re.sub(r'<footer[^>]*>.*?</footer>', '', text, flags=re.DOTALL)
-    
-    # Convert some tags to text markers
-    text = re.sub(r'<br\s*/?>', '\n', text)
-    text = re.sub(r'</p>', '\n\n', text)
-    text = re.sub(r'<h[1-6][^>]*>', '\n## ', text)
-    text = re.sub(r'</h[1-6]>', '\n', text)
-    text = re.sub(r'<li[^>]*>', '\n- ', text)
-    
-    # Remove remaining HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
+    text = ''.join(parser.chunks).translate(_ASCII_PUNCTUATION)
     
     # Clean up whitespace
-    text = re.sub(r'\n\s*\n\s*\n+', '\n\n', text)
-    text = re.sub(r'  +', ' ', text)
+    text = _RE_MULTINL.sub('\n\n', text)
+    text = _RE_MULTISPACE.sub(' ', text)
     text = text.strip()
     
-    # Decode HTML entities
-    text = text.replace('&amp;', '&')
-    text = text.replace('&lt;', '<')
-    text = text.replace('&gt;', '>')
-    text = text.replace('&nbsp;', ' ')
-    text = text.replace('&#8217;', "'")
-    text = text.replace('&#8211;', '-')
-    text = text.replace('&#8220;', '"')
-    text = text.replace('&#8221;', '"')
-    
     # Find the main report content - it typically starts after the title
     # and contains "Payloads:" or similar markers
     report_start = text.find('Payloads')
@@ -121,50 +200,79 @@ def _parse_report_content(html: str) -> dict:
     report_text = text[report_start:report_end].strip()
     content['report_text'] = report_text
     
-    # Try to extract sections
-    sections = {}
-    
-    # Look for Payloads section
-    payloads_match = re.search(r'Payloads?:?\s*(.*?)(?=Systems?:|Look Ahead|Today\'s|Completed|\n## |$)', report_text, re.DOTALL | re.IGNORECASE)
-    if payloads_match:
-        sections['payloads'] = payloads_match.group(1).strip()[:2500]
-    
-    # Look for Systems section
-    systems_match = re.search(r'Systems?:?\s*(.*?)(?=Look Ahead|Today\'s|Completed|\n## |$)', report_text, re.DOTALL | re.IGNORECASE)
-    if systems_match:
-        sections['systems'] = systems_match.group(1).strip()[:1500]
+    # Extract sections
+    sections = _extract_sections(report_text)
     
     content['sections'] = sections
     
     return content
 
 
-def get_report_by_date(date: str) -> str:
+def _extract_sections(report_text: str) -> dict:
     """
-    Fetch the ISS daily report for a specific date from NASA's blog.
+    Extract the Payloads and Systems sections in a single scan.
+    A section runs from its header to the next terminator; Payloads also
+    ends at a 'Systems:' header.
+    """
+    starts, ends = {}, {}
     
-    Args:
-        date: Date in YYYY-MM-DD format (e.g., "2024-07-18")
-              Data available from 2013-03-01 to 2024-07-29
+    def is_open(name: str, pos: int) -> bool:
+        return name in starts and name not in ends and pos >= starts[name]
     
-    Returns:
-        JSON string with the report data, or error if not found.
+    for match in _RE_SECTION.finditer(report_text):
+        pos = match.start()
+        if match.group('payloads') is not None:
+            starts.setdefault('payloads', pos + len(match.group('payloads')))
+        elif match.group('systems') is not None:
+            if match.group('colon') and is_open('payloads', pos):
+                ends['payloads'] = pos
+            starts.setdefault('systems', pos + len(match.group('systems')))
+        else:
+            for name in ('payloads', 'systems'):
+                if is_open(name, pos):
+                    ends[name] = pos
+            if len(ends) == 2:
+                break
+    
+    return {
+        name: report_text[starts[name]:ends.get(name, len(report_text))].strip()[:limit]
+        for name, limit in _SECTION_LIMITS.items()
+        if name in starts
+    }
+
+
+@lru_cache(maxsize=512)
+def _fetch_and_parse(date: str) -> Optional[dict]:
+    """
+    Fetch and parse the report for a date.
+    Returns the parsed content dict, or None if NASA has no report for that date (404).
+    Raises _ReportUnavailable for other failures so they are not cached.
     """
+    url = _build_nasa_url(date)
+    
+    status, parser = _fetch_report_page(url)
+    if status == 404:
+        return None
+    if parser is None:
+        raise _ReportUnavailable(f"HTTP {status}" if status else "connection failed")
+    
+    return _parse_report_content(parser)
+
+
+def _get_report(date: str) -> dict:
+    """Build the report payload (or error payload) for a single date."""
     # Validate date format
     try:
         dt = datetime.strptime(date, "%Y-%m-%d")
     except ValueError:
-        return json.dumps({
+        return {
             "success": False,
             "error": f"Invalid date format: {date}. Use YYYY-MM-DD format."
-        })
+        }
     
     # Check date range
-    start_dt = datetime.strptime(DATA_START_DATE, "%Y-%m-%d")
-    end_dt = datetime.strptime(DATA_END_DATE, "%Y-%m-%d")
-    
-    if dt < start_dt or dt > end_dt:
-        return json.dumps({
+    if dt < _START_DT or dt > _END_DT:
+        return {
             "success": False,
             "error": f"Date {date} is outside available range.",
             "available_range": {
@@ -172,30 +280,29 @@ def get_report_by_date(date: str) -> str:
                 "end": DATA_END_DATE
             },
             "note": "NASA's ISS Daily Summary blog was active from March 2013 to July 29, 2024."
-        })
+        }
     
-    # Build URL and fetch
+    # Fetch and parse (cached per date)
     url = _build_nasa_url(date)
+    try:
+        content = _fetch_and_parse(date)
+    except _ReportUnavailable as e:
+        return {
+            "success": False,
+            "error": f"Could not fetch the report for {date} ({e}).",
+            "url_attempted": url,
+            "suggestion": "NASA's site may be temporarily unreachable. Try again shortly."
+        }
     
-    html = _fetch_url(url)
-    
-    if html is None:
-        # Try without the trailing slash
-        url_alt = url.rstrip('/')
-        html = _fetch_url(url_alt)
-    
-    if html is None:
-        return json.dumps({
+    if content is None:
+        return {
             "success": False,
             "error": f"No report found for {date}. The report may not exist for this date (weekends/holidays often have no reports).",
             "url_attempted": url,
             "suggestion": "Try a nearby weekday date. Reports were typically published Monday-Friday."
-        })
-    
-    # Parse the content
-    content = _parse_report_content(html)
+        }
     
-    return json.dumps({
+    return {
         "success": True,
         "date": date,
         "day_of_week": dt.strftime("%A"),
@@ -204,12 +311,52 @@ def get_report_by_date(date: str) -> str:
         "report_text": content.get('report_text', '')[:5000],  # Limit size for LLM context
         "sections": content.get('sections', {}),
         "note": "Real data from NASA's official ISS Daily Summary Report blog."
-    })
+    }
+
+
+def get_report_by_date(date: str) -> str:
+    """
+    Fetch the ISS daily report for a specific date from NASA's blog.
+    
+    Args:
+        date: Date in YYYY-MM-DD format (e.g., "2024-07-18")
+              Data available from 2013-03-01 to 2024-07-29
+    
+    Returns:
+        JSON string with the report data, or error if not found.
+    """
+    return json.dumps(_get_report(date))
+
+
+def get_reports_by_dates(dates: list) -> str:
+    """
+    Fetch the ISS daily reports for several dates concurrently.
+    
+    Args:
+        dates: List of dates in YYYY-MM-DD format (e.g., ["2024-07-15", "2024-07-16"]).
+               A single string (e.g., "2024-07-15, 2024-07-16") is also accepted,
+               since small local models often pass one instead of a list.
+    
+    Returns:
+        JSON string with a list of report results, in the same order as dates.
+    """
+    if isinstance(dates, str):
+        dates = [d.strip() for d in dates.split(",") if d.strip()]
+    if not dates:
+        return json.dumps([])
+    
+    with ThreadPoolExecutor(max_workers=min(len(dates), _MAX_FETCH_WORKERS)) as executor:
+        return json.dumps(list(executor.map(_get_report, dates)))
+
+
+# Allow callers (and tests) to drop cached reports
+get_report_by_date.cache_clear = _fetch_and_parse.cache_clear
 
 
 # Map function names to actual functions
 FUNCTION_MAP = {
     "get_report_by_date": get_report_by_date,
+    "get_reports_by_dates": get_reports_by_dates,
 }
 
 
@@ -221,6 +368,13 @@ FOUNDRY_LOCAL_TOOLS = [
         "parameters": {
             "date": {"type": "string", "description": "Date in YYYY-MM-DD format (e.g., '2024-07-18')"}
         }
+    },
+    {
+        "name": "get_reports_by_dates",
+        "description": "Fetch the real ISS Daily Summary Reports from NASA for several dates in one call (e.g., a whole week). Data available from March 2013 to July 29, 2024. Use YYYY-MM-DD format.",
+        "parameters": {
+            "dates": {"type": "array", "items": {"type": "string"}, "description": "List of dates in YYYY-MM-DD format (e.g., ['2024-07-15', '2024-07-16'])"}
+        }
     }
 ]
 
@@ -245,18 +399,18 @@ def parse_foundry_local_response(content: str) -> list:
         return []
     
     # Look for functools[...] pattern
-    match = re.search(r'functools\[(.*)\]', content, re.DOTALL)
+    match = _RE_FUNCTOOLS.search(content)
     if not match:
         return []
     
     try:
-        # Parse the JSON array inside functools[...]
-        tools_json = match.group(1)
-        tools = json.loads(f"[{tools_json}]") if not tools_json.startswith('[') else json.loads(tools_json)
+        # Decode exactly one JSON array starting at the '[' after functools,
+        # so brackets in nested arguments or trailing text don't matter
+        tools, _ = _JSON_DECODER.raw_decode(content, match.end() - 1)
         
-        # Normalize to list
-        if isinstance(tools, dict):
-            tools = [tools]
+        # Unwrap functools[[{...}]]
+        if len(tools) == 1 and isinstance(tools[0], list):
+            tools = tools[0]
         
         return tools
     except json.JSONDecodeError:
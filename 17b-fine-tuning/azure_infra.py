@@ -5,19 +5,48 @@ Handles provisioning Azure resources (ACA, Storage, GPU) for fine-tuning.
 """
 import subprocess
 import json
-import shlex
+import tempfile
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from typing import Tuple
 
-def run_az(cmd: str, check: bool = True) -> subprocess.CompletedProcess:
-    """Run Azure CLI command."""
-    print(f"Executing: az {cmd[:50]}...")
-    result = subprocess.run(["az"] + shlex.split(cmd), capture_output=True, text=True)
+# Parallel blob downloads when fetching the fine-tuned adapter
+DOWNLOAD_WORKERS = 8
+
+# Job polling backoff: react quickly to short jobs, poll rarely on long ones
+POLL_INITIAL_SECONDS = 2.0
+POLL_MAX_SECONDS = 60.0
+
+def run_az(*args: str, check: bool = True) -> subprocess.CompletedProcess:
+    """Run Azure CLI command (arguments are passed to az as-is, no shell parsing)."""
+    print(f"Executing: az {' '.join(args)[:50]}...")
+    result = subprocess.run(["az", *args], capture_output=True, text=True)
     if check and result.returncode != 0:
         raise Exception(f"Azure CLI error: {result.stderr}")
     return result
 
+@lru_cache(maxsize=1)
+def _get_signed_in_user_id() -> str:
+    """Object id of the signed-in Azure CLI user (looked up once per session)."""
+    return run_az("ad", "signed-in-user", "show", "--query", "id", "-o", "tsv").stdout.strip()
+
+@lru_cache(maxsize=32)
+def _get_storage_id(resource_group: str, storage_account: str) -> str:
+    """Resource id of a storage account (looked up once per account)."""
+    return run_az("storage", "account", "show", "--name", storage_account, "--resource-group", resource_group, "--query", "id", "-o", "tsv").stdout.strip()
+
+def _deploy_template(resource_group: str, deployment_name: str, template: dict):
+    """Deploy an ARM template from a private temp file (safe for concurrent submissions)."""
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(template, f, separators=(",", ":"))
+        template_path = f.name
+    try:
+        run_az("deployment", "group", "create", "--resource-group", resource_group, "--template-file", template_path, "--name", deployment_name)
+    finally:
+        os.unlink(template_path)
+
 def provision_infrastructure(
     resource_group: str,
     location: str,
@@ -29,28 +58,28 @@ def provision_infrastructure(
     """Provision Resource Group, Storage, and ACA Environment with GPU support."""
     
     # 1. Resource Group
-    run_az(f"group create --name {resource_group} --location {location}")
+    run_az("group", "create", "--name", resource_group, "--location", location)
     
     # 2. Storage Account
-    run_az(f"storage account create --name {storage_account} --resource-group {resource_group} --sku Standard_LRS", check=False)
+    run_az("storage", "account", "create", "--name", storage_account, "--resource-group", resource_group, "--sku", "Standard_LRS", check=False)
     
     # 3. Role Assignment (Storage Blob Data Contributor to User)
-    user_id = json.loads(run_az("ad signed-in-user show -o json").stdout)["id"]
-    storage_id = json.loads(run_az(f"storage account show --name {storage_account} --resource-group {resource_group} -o json").stdout)["id"]
+    user_id = _get_signed_in_user_id()
+    storage_id = _get_storage_id(resource_group, storage_account)
     
-    run_az(f"role assignment create --role 'Storage Blob Data Contributor' --assignee {user_id} --scope {storage_id}", check=False)
+    run_az("role", "assignment", "create", "--role", "Storage Blob Data Contributor", "--assignee", user_id, "--scope", storage_id, check=False)
     
     # 4. Upload Data
-    run_az(f"storage container create --name {container_name} --account-name {storage_account} --auth-mode login", check=False)
-    run_az(f"storage blob upload --account-name {storage_account} --container-name {container_name} --file {training_data_path} --name train.jsonl --auth-mode login --overwrite", check=False)
+    run_az("storage", "container", "create", "--name", container_name, "--account-name", storage_account, "--auth-mode", "login", check=False)
+    run_az("storage", "blob", "upload", "--account-name", storage_account, "--container-name", container_name, "--file", training_data_path, "--name", "train.jsonl", "--auth-mode", "login", "--overwrite", check=False)
     
     # 5. ACA Environment (with A100 GPU profile)
-    run_az(f"containerapp env create --name {aca_env_name} --resource-group {resource_group} --location {location} --enable-workload-profiles", check=False)
+    run_az("containerapp", "env", "create", "--name", aca_env_name, "--resource-group", resource_group, "--location", location, "--enable-workload-profiles", check=False)
     
     # Add GPU profile if not exists
-    run_az(f"containerapp env workload-profile add --name {aca_env_name} --resource-group {resource_group} --workload-profile-name gpu-a100 --workload-profile-type Consumption-GPU-NC24-A100", check=False)
+    run_az("containerapp", "env", "workload-profile", "add", "--name", aca_env_name, "--resource-group", resource_group, "--workload-profile-name", "gpu-a100", "--workload-profile-type", "Consumption-GPU-NC24-A100", check=False)
     
-    env_id = json.loads(run_az(f"containerapp env show --name {aca_env_name} --resource-group {resource_group} -o json").stdout)["id"]
+    env_id = run_az("containerapp", "env", "show", "--name", aca_env_name, "--resource-group", resource_group, "--query", "id", "-o", "tsv").stdout.strip()
     return env_id
 
 def submit_finetune_job(
@@ -64,20 +93,23 @@ def submit_finetune_job(
 ):
     """Submit the Olive fine-tuning job to ACA."""
     
-    script = (
-        "source /opt/conda/etc/profile.d/conda.sh && conda activate ptca && "
-        "pip install --no-cache-dir transformers==4.53.3 accelerate datasets peft olive-ai[auto-opt] azure-storage-blob azure-cli && "
-        "az login --identity && mkdir -p /data /output && "
-        f"az storage blob download --account-name {storage_account} --container-name {container_name} --name train.jsonl --file /data/train.jsonl --auth-mode login && "
+    steps = [
+        "source /opt/conda/etc/profile.d/conda.sh",
+        "conda activate ptca",
+        "pip install --no-cache-dir transformers==4.53.3 accelerate datasets peft olive-ai[auto-opt] azure-storage-blob azure-cli",
+        "az login --identity",
+        "mkdir -p /data /output",
+        f"az storage blob download --account-name {storage_account} --container-name {container_name} --name train.jsonl --file /data/train.jsonl --auth-mode login",
         f"olive finetune --method lora --model_name_or_path {base_model} --trust_remote_code "
         "--data_name json --data_files /data/train.jsonl "
         "--text_template '<|system|>{system}<|end|><|user|>{user}<|end|><|assistant|>{assistant}<|end|>' "
         "--max_steps 300 --learning_rate 2e-4 --output_path /output/ft "
-        "--target_modules qkv_proj,o_proj,gate_up_proj,down_proj --log_level 1 && "
-        f"az storage blob upload-batch --account-name {storage_account} --auth-mode login --destination {container_name} --source /output/ft --destination-path ft/"
-    )
+        "--target_modules qkv_proj,o_proj,gate_up_proj,down_proj --log_level 1",
+        f"az storage blob upload-batch --account-name {storage_account} --auth-mode login --destination {container_name} --source /output/ft --destination-path ft/",
+    ]
+    script = " && ".join(steps)
 
-    run_az(f"containerapp job delete --name {job_name} --resource-group {resource_group} --yes", check=False)
+    run_az("containerapp", "job", "delete", "--name", job_name, "--resource-group", resource_group, "--yes", check=False)
     time.sleep(5)
 
     
@@ -106,51 +138,87 @@ def submit_finetune_job(
         }]
     }
     
-    with open("job.json", "w") as f:
-        json.dump(job_spec, f, indent=2)
-        
-    run_az(f"deployment group create --resource-group {resource_group} --template-file job.json --name {job_name}-deploy")
+    _deploy_template(resource_group, f"{job_name}-deploy", job_spec)
     
-    job_id = json.loads(run_az(f"containerapp job show --name {job_name} --resource-group {resource_group} -o json").stdout)
-    principal_id = job_id["identity"]["principalId"]
-    storage_id = json.loads(run_az(f"storage account show --name {storage_account} --resource-group {resource_group} -o json").stdout)["id"]
+    principal_id = run_az("containerapp", "job", "show", "--name", job_name, "--resource-group", resource_group, "--query", "identity.principalId", "-o", "tsv").stdout.strip()
+    storage_id = _get_storage_id(resource_group, storage_account)
     
-    run_az(f"role assignment create --role 'Storage Blob Data Contributor' --assignee-object-id {principal_id} --assignee-principal-type ServicePrincipal --scope {storage_id}", check=False)
+    run_az("role", "assignment", "create", "--role", "Storage Blob Data Contributor", "--assignee-object-id", principal_id, "--assignee-principal-type", "ServicePrincipal", "--scope", storage_id, check=False)
     
     time.sleep(15)
-    run_az(f"containerapp job start --name {job_name} --resource-group {resource_group}")
+    run_az("containerapp", "job", "start", "--name", job_name, "--resource-group", resource_group)
     print("Fine-tuning job started on ACA Serverless GPU.")
 
 def monitor_job(job_name: str, resource_group: str) -> bool:
-    """Poll job status until success or failure."""
+    """Poll job status until success or failure, backing off between polls."""
     print("Monitoring job...")
+    delay = POLL_INITIAL_SECONDS
     while True:
-        status_json = run_az(f"containerapp job execution list --name {job_name} --resource-group {resource_group} -o json", check=False)
-        if status_json.returncode == 0:
-            executions = json.loads(status_json.stdout)
-            if executions:
-                status = executions[0]["properties"]["status"]
-                print(f"Status: {status}")
-                if status == "Succeeded": return True
-                if status == "Failed": return False
-        time.sleep(30)
+        status_result = run_az("containerapp", "job", "execution", "list", "--name", job_name, "--resource-group", resource_group, "--query", "[0].properties.status", "-o", "tsv", check=False)
+        status = status_result.stdout.strip() if status_result.returncode == 0 else ""
+        if status:
+            print(f"Status: {status}")
+            if status == "Succeeded": return True
+            if status == "Failed": return False
+        time.sleep(delay)
+        delay = min(delay * 1.5, POLL_MAX_SECONDS)
+
+def _download_blob(storage_account: str, container_name: str, blob_name: str, output_path: str):
+    """Download a single blob below output_path, keeping its virtual directory."""
+    local_path = os.path.join(output_path, blob_name)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    run_az("storage", "blob", "download", "--account-name", storage_account, "--container-name", container_name, "--name", blob_name, "--file", local_path, "--auth-mode", "login")
+
+def _blob_container_client(storage_account: str, container_name: str):
+    """Create an in-process blob container client, or None if the Azure Storage SDK is not installed."""
+    try:
+        from azure.identity import DefaultAzureCredential
+        from azure.storage.blob import ContainerClient
+    except ImportError:
+        return None
+    return ContainerClient(
+        f"https://{storage_account}.blob.core.windows.net",
+        container_name,
+        credential=DefaultAzureCredential(),
+    )
+
+def _download_blob_sdk(container, blob_name: str, output_path: str):
+    """Download a single blob below output_path through the SDK client."""
+    local_path = os.path.join(output_path, blob_name)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    with open(local_path, "wb") as f:
+        container.download_blob(blob_name).readinto(f)
+
+def _download_all(download, blob_names: list) -> None:
+    """Run download(blob_name) for every blob in parallel, re-raising the first failure."""
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        for future in [executor.submit(download, blob_name) for blob_name in blob_names]:
+            future.result()
 
 def download_model(storage_account: str, container_name: str, output_path: str):
     """Download fine-tuned adapter."""
     os.makedirs(output_path, exist_ok=True)
+    container = _blob_container_client(storage_account, container_name)
+    if container is not None:
+        from azure.core.exceptions import AzureError
+        try:
+            # Azure Storage SDK: one authenticated HTTPS session, no az process per blob
+            blob_names = [blob.name for blob in container.list_blobs(name_starts_with="ft/")]
+            _download_all(partial(_download_blob_sdk, container, output_path=output_path), blob_names)
+            print(f"Downloaded {len(blob_names)} files to {output_path}")
+            return
+        except AzureError as e:
+            # No usable credential or missing data-plane RBAC; the az CLI login may still work
+            print(f"Storage SDK download failed ({type(e).__name__}), falling back to Azure CLI...")
+
     # Workaround for Azure CLI 2.77.0 + Python 3.13 bug with --pattern flag
-    # List blobs first, then download individually
-    list_result = run_az(f"storage blob list --account-name {storage_account} --container-name {container_name} --prefix ft/ --auth-mode login -o json", check=False)
-    if list_result.returncode == 0:
-        blobs = json.loads(list_result.stdout)
-        for blob in blobs:
-            blob_name = blob["name"]
-            local_path = os.path.join(output_path, blob_name)
-            os.makedirs(os.path.dirname(local_path), exist_ok=True)
-            run_az(f"storage blob download --account-name {storage_account} --container-name {container_name} --name {blob_name} --file {local_path} --auth-mode login")
-        print(f"Downloaded {len(blobs)} files to {output_path}")
-    else:
+    # List blob names only, then download them in parallel (each az call pays CLI startup)
+    list_result = run_az("storage", "blob", "list", "--account-name", storage_account, "--container-name", container_name, "--prefix", "ft/", "--auth-mode", "login", "--query", "[].name", "-o", "tsv", check=False)
+    if list_result.returncode != 0:
         raise Exception(f"Failed to list blobs: {list_result.stderr}")
+    blob_names = list_result.stdout.splitlines()
+    _download_all(partial(_download_blob, storage_account, container_name, output_path=output_path), blob_names)
+    print(f"Downloaded {len(blob_names)} files to {output_path}")
 
 
 def submit_evaluation_job(
@@ -164,24 +232,27 @@ def submit_evaluation_job(
 ):
     """Submit evaluation job to ACA with GPU."""
     
-    script = (
-        "source /opt/conda/etc/profile.d/conda.sh && conda activate ptca && "
-        "pip install --no-cache-dir transformers==4.53.3 accelerate peft azure-storage-blob azure-cli && "
-        "az login --identity && mkdir -p /data/ft/adapter /output && "
+    steps = [
+        "source /opt/conda/etc/profile.d/conda.sh",
+        "conda activate ptca",
+        "pip install --no-cache-dir transformers==4.53.3 accelerate peft azure-storage-blob azure-cli",
+        "az login --identity",
+        "mkdir -p /data/ft/adapter /output",
         # Download adapter files individually (workaround for pattern issues)
         f"for blob in $(az storage blob list --account-name {storage_account} --container-name {container_name} --prefix ft/ --auth-mode login --query '[].name' -o tsv); do "
-        f"mkdir -p /data/$(dirname $blob) && az storage blob download --account-name {storage_account} --container-name {container_name} --name $blob --file /data/$blob --auth-mode login; done && "
-        f"ls -la /data/ft/adapter/ && "  # Debug: list adapter files
+        f"mkdir -p /data/$(dirname $blob) && az storage blob download --account-name {storage_account} --container-name {container_name} --name $blob --file /data/$blob --auth-mode login; done",
+        "ls -la /data/ft/adapter/",  # Debug: list adapter files
         # Download eval data and script
-        f"az storage blob download --account-name {storage_account} --container-name {container_name} --name eval_data.json --file /data/eval_data.json --auth-mode login && "
-        f"az storage blob download --account-name {storage_account} --container-name {container_name} --name eval_script.py --file /data/eval_script.py --auth-mode login && "
+        f"az storage blob download --account-name {storage_account} --container-name {container_name} --name eval_data.json --file /data/eval_data.json --auth-mode login",
+        f"az storage blob download --account-name {storage_account} --container-name {container_name} --name eval_script.py --file /data/eval_script.py --auth-mode login",
         # Run evaluation script
-        "python3 /data/eval_script.py && "
+        "python3 /data/eval_script.py",
         # Upload results
-        f"az storage blob upload --account-name {storage_account} --container-name {container_name} --file /output/eval_results.json --name eval_results.json --auth-mode login --overwrite"
-    )
+        f"az storage blob upload --account-name {storage_account} --container-name {container_name} --file /output/eval_results.json --name eval_results.json --auth-mode login --overwrite",
+    ]
+    script = " && ".join(steps)
     
-    run_az(f"containerapp job delete --name {job_name} --resource-group {resource_group} --yes", check=False)
+    run_az("containerapp", "job", "delete", "--name", job_name, "--resource-group", resource_group, "--yes", check=False)
     time.sleep(5)
     
     job_spec = {
@@ -209,27 +280,21 @@ def submit_evaluation_job(
         }]
     }
     
-    with open("eval_job.json", "w") as f:
-        json.dump(job_spec, f, indent=2)
-        
-    run_az(f"deployment group create --resource-group {resource_group} --template-file eval_job.json --name {job_name}-deploy")
+    _deploy_template(resource_group, f"{job_name}-deploy", job_spec)
     
     # Assign storage permissions
-    job_id = json.loads(run_az(f"containerapp job show --name {job_name} --resource-group {resource_group} -o json").stdout)
-    principal_id = job_id["identity"]["principalId"]
-    storage_id = json.loads(run_az(f"storage account show --name {storage_account} --resource-group {resource_group} -o json").stdout)["id"]
+    principal_id = run_az("containerapp", "job", "show", "--name", job_name, "--resource-group", resource_group, "--query", "identity.principalId", "-o", "tsv").stdout.strip()
+    storage_id = _get_storage_id(resource_group, storage_account)
     
-    run_az(f"role assignment create --role 'Storage Blob Data Contributor' --assignee-object-id {principal_id} --assignee-principal-type ServicePrincipal --scope {storage_id}", check=False)
+    run_az("role", "assignment", "create", "--role", "Storage Blob Data Contributor", "--assignee-object-id", principal_id, "--assignee-principal-type", "ServicePrincipal", "--scope", storage_id, check=False)
     
     time.sleep(15)
-    run_az(f"containerapp job start --name {job_name} --resource-group {resource_group}")
+    run_az("containerapp", "job", "start", "--name", job_name, "--resource-group", resource_group)
     print("Evaluation job started on ACA GPU.")
 
 
 def upload_eval_data(storage_account: str, container_name: str, eval_dataset: list, reports_data: dict, base_model: str):
     """Upload evaluation data and script to blob storage."""
-    import tempfile
-    
     # Create eval data bundle
     eval_bundle = {
         "eval_dataset": eval_dataset,
@@ -339,20 +404,18 @@ print("Results saved to /output/eval_results.json")
         script_path = f.name
     
     # Upload both files
-    run_az(f"storage blob upload --account-name {storage_account} --container-name {container_name} --file {eval_data_path} --name eval_data.json --auth-mode login --overwrite")
-    run_az(f"storage blob upload --account-name {storage_account} --container-name {container_name} --file {script_path} --name eval_script.py --auth-mode login --overwrite")
+    run_az("storage", "blob", "upload", "--account-name", storage_account, "--container-name", container_name, "--file", eval_data_path, "--name", "eval_data.json", "--auth-mode", "login", "--overwrite")
+    run_az("storage", "blob", "upload", "--account-name", storage_account, "--container-name", container_name, "--file", script_path, "--name", "eval_script.py", "--auth-mode", "login", "--overwrite")
     
     print("Uploaded eval data and script to blob storage.")
 
 
 def download_eval_results(storage_account: str, container_name: str) -> dict:
     """Download evaluation results from blob storage."""
-    import tempfile
-    
     with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
         output_path = f.name
     
-    run_az(f"storage blob download --account-name {storage_account} --container-name {container_name} --name eval_results.json --file {output_path} --auth-mode login")
+    run_az("storage", "blob", "download", "--account-name", storage_account, "--container-name", container_name, "--name", "eval_results.json", "--file", output_path, "--auth-mode", "login")
     
     with open(output_path) as f:
         results = json.load(f)
@@ -4,9 +4,14 @@ Azure resource cleanup utilities.
 
 from __future__ import annotations
 
+import asyncio
 import fnmatch
 import json
+import os
 import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import cached_property, lru_cache
+from pathlib import Path
 from typing import Any
 
 from rich.console import Console
@@ -16,6 +21,17 @@ from .models import TestConfig
 
 console = Console()
 
+MAX_CLEANUP_WORKERS = 16
+
+ARM_BATCH_URL = "https://management.azure.com/batch?api-version=2020-06-01"
+
+# az CLI listings used on the non-SDK path
+AZ_LIST_GROUP_NAMES = ["group", "list", "--query", "[].name"]
+AZ_LIST_DELETED_ACCOUNTS = ["cognitiveservices", "account", "list-deleted", "--query", "[].{name:name, location:location, id:id}"]
+
+# az CLI files that change when the user logs in or switches subscription
+_AZ_CONFIG_FILES = (Path.home() / ".azure" / "clouds.config", Path.home() / ".azure" / "azureProfile.json")
+
 
 def _az_json(args: list[str], timeout: int = 60) -> list[dict[str, Any]]:
     """Run az CLI command and return parsed JSON output."""
@@ -31,12 +47,122 @@ def _az_json(args: list[str], timeout: int = 60) -> list[dict[str, Any]]:
         return []
 
 
+async def _az_json_async(args: list[str], timeout: int = 60) -> list[dict[str, Any]]:
+    """Async variant of _az_json, so several az processes can run at once."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "az", *args, "-o", "json",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return []
+        return json.loads(stdout) if proc.returncode == 0 and stdout.strip() else []
+    except Exception:
+        return []
+
+
+def _az_json_concurrent(*commands: list[str]) -> list[list[dict[str, Any]]]:
+    """Run several az CLI commands concurrently; parsed outputs are returned in order."""
+    async def run_all() -> list[list[dict[str, Any]]]:
+        return await asyncio.gather(*(_az_json_async(args) for args in commands))
+
+    return asyncio.run(run_all())
+
+
+def _az_run(args: list[str], timeout: int) -> tuple[bool, str]:
+    """Run az CLI command, returning (success, error message)."""
+    try:
+        result = subprocess.run(["az", *args], capture_output=True, text=True, timeout=timeout)
+    except Exception as e:
+        return False, str(e)
+    return result.returncode == 0, result.stderr.strip()
+
+
+def _sdk_run(fn, *args) -> tuple[bool, str]:
+    """Call an Azure SDK operation, returning (success, error message)."""
+    try:
+        fn(*args)
+    except Exception as e:
+        return False, str(e)
+    return True, ""
+
+
+@lru_cache(maxsize=1)
+def _cached_account(subscription_env: str, config_mtimes: tuple[float, ...]) -> dict[str, Any]:
+    """Parsed `az account show`; the arguments only serve as the cache key."""
+    account = _az_json(["account", "show"], timeout=10)
+    return account if isinstance(account, dict) else {}
+
+
+def az_account() -> dict[str, Any]:
+    """Current az CLI account, or {} when not logged in.
+
+    Cached until AZURE_SUBSCRIPTION_ID or the az login/subscription files change.
+    """
+    mtimes = tuple(p.stat().st_mtime if p.exists() else 0.0 for p in _AZ_CONFIG_FILES)
+    return _cached_account(os.environ.get("AZURE_SUBSCRIPTION_ID", ""), mtimes)
+
+
+def _subscription_id() -> str:
+    """Subscription to clean up: AZURE_SUBSCRIPTION_ID, else the az CLI default."""
+    return os.environ.get("AZURE_SUBSCRIPTION_ID") or az_account().get("id", "")
+
+
+class _SdkClients:
+    """Azure management SDK clients, created once and shared by all cleanup runs."""
+
+    _instance: _SdkClients | None = None
+    _unavailable = False
+
+    def __init__(self, subscription_id: str):
+        from azure.identity import DefaultAzureCredential
+        from azure.mgmt.cognitiveservices import CognitiveServicesManagementClient
+        from azure.mgmt.resource import ResourceManagementClient
+
+        credential = DefaultAzureCredential()
+        self.resource = ResourceManagementClient(credential, subscription_id)
+        self.cognitive = CognitiveServicesManagementClient(credential, subscription_id)
+
+    @classmethod
+    def get(cls) -> _SdkClients | None:
+        """Return the shared clients, or None if the SDK is not installed or no subscription is set."""
+        if cls._instance is None and not cls._unavailable:
+            try:
+                if subscription_id := _subscription_id():
+                    cls._instance = cls(subscription_id)
+            except ImportError:
+                pass
+            cls._unavailable = cls._instance is None
+        return cls._instance
+
+
+def _run_parallel(fn, items: list):
+    """Run fn over items in a thread pool, yielding (item, ok, err) as calls finish."""
+    with ThreadPoolExecutor(max_workers=min(MAX_CLEANUP_WORKERS, len(items))) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            yield (futures[future], *future.result())
+
+
 class AzureCleanup:
-    """Cleans up Azure resources created during tests."""
+    """Cleans up Azure resources created during tests.
+
+    Uses the Azure management SDK in-process when it is installed, otherwise
+    falls back to the az CLI (also forced by `cleanup.use_sdk: false`).
+    """
 
     def __init__(self, config: TestConfig):
         self.config = config
 
+    @cached_property
+    def _sdk(self) -> _SdkClients | None:
+        return _SdkClients.get() if self.config.cleanup.use_sdk else None
+
     def run(self, dry_run: bool = False) -> None:
         """Execute full cleanup."""
         console.print()
@@ -57,33 +183,85 @@ class AzureCleanup:
         console.print()
         console.print(Panel.fit("[bold]Resources to Clean Up[/bold]", border_style="blue"))
 
+        if self._sdk:
+            all_rgs, deleted = self._list_resource_groups(), self._list_deleted_accounts()
+        else:
+            # One ARM round trip for both listings, else both az listings side by side
+            all_rgs, deleted = self._list_resources_batched() or _az_json_concurrent(
+                AZ_LIST_GROUP_NAMES, AZ_LIST_DELETED_ACCOUNTS
+            )
+
         console.print("\n[bold]Resource Groups:[/bold]")
-        if rgs := self._get_matching_resource_groups():
+        if rgs := self._filter_resource_groups(all_rgs):
             for rg in rgs:
                 console.print(f"  - {rg}")
         else:
             console.print("  [dim]No matching resource groups[/dim]")
 
         console.print("\n[bold]Soft-Deleted Cognitive Services:[/bold]")
-        deleted = _az_json(["cognitiveservices", "account", "list-deleted", "--query", "[].{name:name, location:location}"])
         if deleted:
             for acc in deleted:
                 console.print(f"  - {acc['name']} ({acc['location']})")
         else:
             console.print("  [dim]None[/dim]")
 
+    def _list_resource_groups(self) -> list[str]:
+        """Names of all resource groups in the subscription."""
+        if not self._sdk:
+            return _az_json(AZ_LIST_GROUP_NAMES, timeout=30)
+        try:
+            return [rg.name for rg in self._sdk.resource.resource_groups.list()]
+        except Exception:
+            return []
+
+    def _list_deleted_accounts(self) -> list[dict[str, Any]]:
+        """Soft-deleted Cognitive Services accounts as {name, location, id} dicts."""
+        if not self._sdk:
+            return _az_json(AZ_LIST_DELETED_ACCOUNTS)
+        try:
+            return [
+                {"name": acc.name, "location": acc.location, "id": acc.id}
+                for acc in self._sdk.cognitive.deleted_accounts.list()
+            ]
+        except Exception:
+            return []
+
+    def _list_resources_batched(self) -> tuple[list[str], list[dict[str, Any]]] | None:
+        """List resource groups and soft-deleted accounts in a single `az rest` ARM batch call.
+
+        Returns None if the batch call fails or a listing is paged, so callers can
+        fall back to the separate az commands.
+        """
+        if not (subscription_id := _subscription_id()):
+            return None
+        body = {"requests": [
+            {"httpMethod": "GET", "url": f"/subscriptions/{subscription_id}/resourcegroups?api-version=2021-04-01"},
+            {"httpMethod": "GET", "url": f"/subscriptions/{subscription_id}/providers/Microsoft.CognitiveServices/deletedAccounts?api-version=2023-05-01"},
+        ]}
+        response = _az_json(["rest", "--method", "post", "--url", ARM_BATCH_URL, "--body", json.dumps(body)])
+        responses = response.get("responses", []) if isinstance(response, dict) else []
+        if len(responses) != 2 or any(r.get("httpStatusCode") != 200 or "nextLink" in r.get("content", {}) for r in responses):
+            return None
+
+        groups, accounts = (r["content"].get("value", []) for r in responses)
+        return (
+            [rg["name"] for rg in groups],
+            [{"name": acc.get("name"), "location": acc.get("location"), "id": acc.get("id")} for acc in accounts],
+        )
+
     def _get_matching_resource_groups(self) -> list[str]:
         """Get existing resource groups matching configured patterns."""
-        all_rgs = _az_json(["group", "list", "--query", "[].name"], timeout=30)
+        return self._filter_resource_groups(self._list_resource_groups())
+
+    def _filter_resource_groups(self, all_rgs: list[str]) -> list[str]:
+        """Resource groups from all_rgs matching configured patterns."""
         if not all_rgs:
             return []
 
-        matching = []
-        for pattern in self.config.cleanup.resource_groups:
-            for rg in all_rgs:
-                if fnmatch.fnmatch(rg, pattern) and rg not in matching:
-                    matching.append(rg)
-        return matching
+        # dict preserves pattern order while dropping groups matched twice
+        return list(dict.fromkeys(
+            rg for pattern in self.config.cleanup.resource_groups for rg in fnmatch.filter(all_rgs, pattern)
+        ))
 
     def _delete_resource_groups(self, dry_run: bool) -> None:
         """Delete resource groups matching patterns."""
@@ -94,38 +272,51 @@ class AzureCleanup:
 
         console.print(f"  [bold]Resource groups to delete ({len(rgs)}):[/bold]")
 
-        for rg in rgs:
-            if dry_run:
+        if dry_run:
+            for rg in rgs:
                 console.print(f"    [yellow]Would delete:[/yellow] {rg}")
-            else:
-                console.print(f"    [red]Deleting:[/red] {rg}...", end=" ")
-                try:
-                    subprocess.run(["az", "group", "delete", "-n", rg, "--yes", "--no-wait"], capture_output=True, timeout=60)
-                    console.print("[green]queued[/green]")
-                except Exception as e:
-                    console.print(f"[red]failed: {e}[/red]")
+            return
+
+        for rg, ok, err in _run_parallel(self._delete_one, rgs):
+            status = "[green]queued[/green]" if ok else f"[red]failed: {err}[/red]"
+            console.print(f"    [red]Deleting:[/red] {rg}... {status}")
+
+    def _delete_one(self, rg: str) -> tuple[bool, str]:
+        """Queue deletion of a single resource group (does not wait for it to finish)."""
+        if self._sdk:
+            return _sdk_run(self._sdk.resource.resource_groups.begin_delete, rg)
+        return _az_run(["group", "delete", "-n", rg, "--yes", "--no-wait"], timeout=60)
 
     def _purge_cognitive_services(self, dry_run: bool) -> None:
         """Purge soft-deleted Cognitive Services accounts."""
         console.print("  [bold]Checking for soft-deleted Cognitive Services...[/bold]")
 
-        deleted = _az_json(["cognitiveservices", "account", "list-deleted"])
+        deleted = self._list_deleted_accounts()
         if not deleted:
             console.print("    [dim]No soft-deleted accounts found[/dim]")
             return
 
         console.print(f"    Found {len(deleted)} soft-deleted account(s)")
 
-        for account in deleted:
-            name = account.get("name", "unknown")
-            resource_id = account.get("id", "")
-
-            if dry_run:
-                console.print(f"    [yellow]Would purge:[/yellow] {name}")
-            else:
-                console.print(f"    [red]Purging:[/red] {name}...", end=" ")
-                try:
-                    subprocess.run(["az", "cognitiveservices", "account", "purge", "--id", resource_id], capture_output=True, timeout=120)
-                    console.print("[green]done[/green]")
-                except Exception as e:
-                    console.print(f"[red]failed: {e}[/red]")
+        if dry_run:
+            for account in deleted:
+                console.print(f"    [yellow]Would purge:[/yellow] {account.get('name', 'unknown')}")
+            return
+
+        for account, ok, err in _run_parallel(self._purge_one, deleted):
+            status = "[green]done[/green]" if ok else f"[red]failed: {err}[/red]"
+            console.print(f"    [red]Purging:[/red] {account.get('name', 'unknown')}... {status}")
+
+    def _purge_one(self, account: dict[str, Any]) -> tuple[bool, str]:
+        """Purge a single soft-deleted Cognitive Services account."""
+        resource_id = account.get("id", "")
+        if self._sdk:
+            # .../locations/{location}/resourceGroups/{rg}/deletedAccounts/{name}
+            parts = resource_id.split("/")
+            ids = dict(zip(parts[1::2], parts[2::2]))
+            return _sdk_run(
+                lambda: self._sdk.cognitive.deleted_accounts.begin_purge(
+                    ids.get("locations", ""), ids.get("resourceGroups", ""), ids.get("deletedAccounts", "")
+                ).result()
+            )
+        return _az_run(["cognitiveservices", "account", "purge", "--id", resource_id], timeout=120)
@@ -12,7 +12,7 @@ from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
 
-from .cleanup import AzureCleanup
+from .cleanup import AzureCleanup, az_account
 from .models import TestConfig
 from .reports import ReportGenerator
 from .runner import TestRunner
@@ -40,9 +40,12 @@ def run(
     notebook: Optional[str] = typer.Option(None, "--notebook", "-n", help="Run specific notebook (includes dependencies)"),
     dry_run: bool = typer.Option(False, "--dry-run", help="Show what would be executed without running"),
     report: Optional[str] = typer.Option(None, "--report", "-r", help="Generate report (junit, markdown, html)"),
+    keep_scripts: bool = typer.Option(False, "--keep-scripts", help="Write generated scripts to the output directory"),
 ) -> None:
     """Run notebook tests."""
     config = load_config()
+    if keep_scripts:
+        config.settings.keep_scripts = True
 
     if dry_run:
         notebooks = config.get_execution_order(notebook)
@@ -133,7 +136,7 @@ def extract(
 @app.command()
 def info() -> None:
     """Show configuration and environment info."""
-    import subprocess
+    import shutil
 
     config = load_config()
 
@@ -148,11 +151,12 @@ def info() -> None:
     console.print(f"\n[bold]Notebooks:[/bold] {len(config.notebooks)}")
     console.print(f"[bold]Cleanup patterns:[/bold] {len(config.cleanup.resource_groups)}")
 
-    try:
-        result = subprocess.run(["az", "account", "show", "--query", "name", "-o", "tsv"], capture_output=True, text=True, timeout=10)
-        status = f"[green]Logged in as {result.stdout.strip()}[/green]" if result.returncode == 0 else "[yellow]Not logged in[/yellow]"
-    except Exception:
+    if not shutil.which("az"):
         status = "[red]Not available[/red]"
+    elif account := az_account():
+        status = f"[green]Logged in as {account.get('name', '')}[/green]"
+    else:
+        status = "[yellow]Not logged in[/yellow]"
     console.print(f"\n[bold]Azure CLI:[/bold] {status}")
 
 
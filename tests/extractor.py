@@ -9,15 +9,58 @@ from __future__ import annotations
 
 import json
 import re
+import shlex
+import shutil
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterator
 
+try:
+    import ijson  # streams cells without loading the whole notebook
+except ImportError:
+    ijson = None
+
+try:
+    import orjson  # faster whole-notebook parsing when ijson is not installed
+except ImportError:
+    orjson = None
+
 # Regex patterns for cell transformations
 RE_WRITEFILE = re.compile(r"^%%writefile\s+(.+)\n", re.MULTILINE)
 RE_BASH = re.compile(r"^%%bash(\s+-s\s+(.+))?\s*\n", re.MULTILINE)
 RE_VAR_INTERPOLATION = re.compile(r"\{[a-zA-Z_][a-zA-Z0-9_]*\}")
 RE_BASH_ARGS = re.compile(r"\$\{?(\w+)\}?")
+RE_INDENT = re.compile(r"\s*")
+# Anything the shell would interpret beyond word splitting and quoting
+RE_SHELL_SYNTAX = re.compile(r"[|&;<>()$`*?\[\]~{}#\\]")
+# Shell builtins and reserved words: some also exist as binaries (cd, test, kill) but only
+# behave as intended inside the shell, so lines starting with them always go through sh
+SHELL_BUILTINS = frozenset({
+    # POSIX special builtins
+    ".", ":", "break", "continue", "eval", "exec", "exit", "export", "readonly", "return", "set", "shift", "times", "trap", "unset",
+    # POSIX regular builtins
+    "alias", "bg", "cd", "command", "false", "fc", "fg", "getopts", "hash", "jobs", "kill", "newgrp", "pwd", "read", "true",
+    "type", "ulimit", "umask", "unalias", "wait", "test", "[",
+    # common bash builtins
+    "builtin", "declare", "dirs", "disown", "enable", "let", "local", "logout", "mapfile", "popd", "pushd", "readarray",
+    "shopt", "source", "typeset",
+    # reserved words
+    "!", "case", "do", "done", "elif", "else", "esac", "fi", "for", "function", "if", "in", "select", "then", "time",
+    "until", "while", "{", "}", "[[", "]]",
+})
+# A line (any str.splitlines() boundary) whose first non-blank character is not "#"
+RE_NON_COMMENT_LINE = re.compile(r"(?:\A|[\n\r\v\f\x1c-\x1e\x85\u2028\u2029])\s*[^#\s]")
+
+# Backslash-escape backslashes and double quotes in one pass (for generated string literals)
+ESCAPE_TABLE = str.maketrans({"\\": "\\\\", '"': '\\"'})
+# String literals (possibly unterminated) are matched whole so their brackets are skipped;
+# group 1 captures opening brackets, group 2 closing ones
+RE_BRACKETS = re.compile(
+    r'"(?:\\.|[^"\\])*(?:"|\\?\Z)'
+    r"|'(?:\\.|[^'\\])*(?:'|\\?\Z)"
+    r"|([([{])|([)\]}])"
+)
 
 SCRIPT_HEADER = '''#!/usr/bin/env python3
 """Auto-generated test script from: {name}"""
@@ -33,32 +76,57 @@ os.chdir("{working_dir}")
 
 '''
 
+# Banner written above each cell: "\n# ═══ Cell {number} ═══\n"
+CELL_BANNER_START = "\n# ═══ Cell "
+CELL_BANNER_END = " ═══\n"
+
 
 @dataclass(frozen=True, slots=True)
 class Cell:
-    """Represents a notebook code cell."""
+    """Represents a notebook cell.
+
+    is_executable is computed once at extraction: a code cell with at least one
+    line that is neither blank nor a comment.
+    """
     number: int
     source: str
     cell_type: str
+    is_executable: bool
+
+
+@lru_cache(maxsize=32)
+def _parse_cells(path: str, mtime_ns: int, size: int) -> tuple[Cell, ...]:
+    """Parse a notebook's cells; mtime and size only key the cache so edits are picked up."""
+    cells = []
+    for i, cell in enumerate(_iter_raw_cells(Path(path)), start=1):
+        source = "".join(cell.get("source", []))
+        cell_type = cell.get("cell_type", "")
+        cells.append(Cell(
+            number=i,
+            source=source,
+            cell_type=cell_type,
+            is_executable=cell_type == "code" and RE_NON_COMMENT_LINE.search(source) is not None,
+        ))
+    return tuple(cells)
 
-    @property
-    def is_code(self) -> bool:
-        return self.cell_type == "code"
 
-    @property
-    def is_empty(self) -> bool:
-        return not self.source.strip()
+def _iter_raw_cells(path: Path) -> Iterator[dict]:
+    """Yield raw cell dicts, streaming with ijson when it is installed."""
+    if ijson is None:
+        yield from _load_notebook(path).get("cells", [])
+        return
 
-    @property
-    def is_commented(self) -> bool:
-        """Check if all non-empty lines are comments."""
-        lines = [line for line in self.source.strip().splitlines() if line.strip()]
-        return not lines or all(line.strip().startswith("#") for line in lines)
+    # Only one cell (with its outputs) is held in memory at a time
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "cells.item")
 
-    @property
-    def is_executable(self) -> bool:
-        """Check if cell should be executed."""
-        return self.is_code and not self.is_empty and not self.is_commented
+
+def _load_notebook(path: Path) -> dict:
+    """Parse the whole notebook, with orjson when it is installed."""
+    if orjson is None:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    return orjson.loads(path.read_bytes())
 
 
 class NotebookExtractor:
@@ -71,15 +139,8 @@ class NotebookExtractor:
 
     def extract_cells(self) -> Iterator[Cell]:
         """Yield all cells from the notebook."""
-        with open(self.notebook_path, encoding="utf-8") as f:
-            nb = json.load(f)
-
-        for i, cell in enumerate(nb.get("cells", []), start=1):
-            yield Cell(
-                number=i,
-                source="".join(cell.get("source", [])),
-                cell_type=cell.get("cell_type", ""),
-            )
+        stat = self.notebook_path.stat()
+        yield from _parse_cells(str(self.notebook_path), stat.st_mtime_ns, stat.st_size)
 
     def extract_code_cells(self, skip_cells: list[int] | None = None) -> Iterator[Cell]:
         """Yield executable code cells, optionally skipping specified cells."""
@@ -100,21 +161,27 @@ class NotebookExtractor:
         if match := RE_BASH.match(code):
             return self._gen_bash(code[match.end() :], match.group(2))
 
-        # Transform shell commands (! and %)
-        code = self._transform_shell_commands(code)
+        # Transform shell commands (! and %), noting top-level async on the way
+        lines, has_async = self._transform_shell_commands(code.splitlines())
 
         # Transform top-level async constructs
-        if self._has_top_level_async(code):
-            code = self._transform_async_code(code)
+        if has_async:
+            # A trailing blank line must not be pulled into the last wrapped statement
+            if lines and not lines[-1]:
+                lines.pop()
+            lines = self._transform_async_code(lines)
 
-        return code
+        return "\n".join(lines)
 
     # --- Shell Command Transformation ---
 
-    def _transform_shell_commands(self, code: str) -> str:
-        """Transform !cmd and %pip commands to subprocess calls."""
-        lines = code.splitlines()
+    def _transform_shell_commands(self, lines: list[str]) -> tuple[list[str], bool]:
+        """Transform !cmd and %pip commands to subprocess calls.
+
+        Returns the transformed lines and whether any of them is a top-level async statement.
+        """
         result = []
+        has_async = False
         i = 0
 
         while i < len(lines):
@@ -122,14 +189,14 @@ class NotebookExtractor:
             stripped = line.strip()
 
             if stripped.startswith(("!", "%pip")):
-                indent = line[: len(line) - len(line.lstrip())]
+                indent = line[: RE_INDENT.match(line).end()]
                 cmd, i = self._collect_shell_command(lines, i, stripped)
-                result.append(self._gen_subprocess(cmd, indent))
-            else:
-                result.append(line)
+                line = self._gen_subprocess(cmd, indent)
+            result.append(line)
+            has_async = has_async or self._is_top_level_async(line)
             i += 1
 
-        return "\n".join(result)
+        return result, has_async
 
     def _collect_shell_command(self, lines: list[str], start: int, first_line: str) -> tuple[str, int]:
         """Collect shell command including backslash continuations."""
@@ -149,12 +216,32 @@ class NotebookExtractor:
         """Generate subprocess.run() call for a shell command."""
         if RE_VAR_INTERPOLATION.search(cmd):
             return f'{indent}subprocess.run(f"""{cmd}""", shell=True, check=True)'
-        escaped = cmd.replace("\\", "\\\\").replace('"', '\\"')
+        if argv := self._split_plain_command(cmd):
+            # No shell features used: run the program directly, without /bin/sh
+            return f"{indent}subprocess.run({argv!r}, check=True)"
+        escaped = cmd.translate(ESCAPE_TABLE)
         return f'{indent}subprocess.run("{escaped}", shell=True, check=True)'
 
+    @staticmethod
+    def _split_plain_command(cmd: str) -> list[str] | None:
+        """Split a command into argv if it needs nothing from the shell, else None."""
+        if RE_SHELL_SYNTAX.search(cmd):
+            return None
+        try:
+            argv = shlex.split(cmd)
+        except ValueError:  # unbalanced quotes
+            return None
+        # "VAR=value cmd" sets the environment in the shell
+        if not argv or argv[0] in SHELL_BUILTINS or "=" in argv[0]:
+            return None
+        # Only exec directly what resolves to a real program; anything else keeps sh's semantics
+        if shutil.which(argv[0]) is None:
+            return None
+        return argv
+
     def _gen_writefile(self, filename: str, content: str) -> str:
         """Generate code to write a file."""
-        escaped = content.replace("\\", "\\\\").replace('"""', '\\"\\"\\"')
+        escaped = content.translate(ESCAPE_TABLE)
         return f'''import os
 os.makedirs(os.path.dirname("{filename}") or ".", exist_ok=True)
 with open("{filename}", "w") as _f:
@@ -174,18 +261,16 @@ print(f"Written: {filename}")'''
 
     # --- Async Transformation ---
 
-    def _has_top_level_async(self, code: str) -> bool:
-        """Check if code has top-level async constructs."""
-        for line in code.splitlines():
-            if line and not line[0].isspace():
-                stripped = line.strip()
-                if stripped.startswith("await ") or " = await " in stripped or stripped.startswith("async for "):
-                    return True
-        return False
+    @staticmethod
+    def _is_top_level_async(line: str) -> bool:
+        """Check if a line is a top-level async construct."""
+        if not line or line[0].isspace():
+            return False
+        stripped = line.strip()
+        return stripped.startswith("await ") or " = await " in stripped or stripped.startswith("async for ")
 
-    def _transform_async_code(self, code: str) -> str:
+    def _transform_async_code(self, lines: list[str]) -> list[str]:
         """Transform top-level await/async statements to asyncio.run() calls."""
-        lines = code.splitlines()
         result = []
         i = 0
 
@@ -217,7 +302,7 @@ print(f"Written: {filename}")'''
             result.append(line)
             i += 1
 
-        return "\n".join(result)
+        return result
 
     def _wrap_async(self, first_expr: str, cont_lines: list[str], var_name: str | None = None) -> list[str]:
         """Wrap await expression in async helper function."""
@@ -265,24 +350,8 @@ print(f"Written: {filename}")'''
 
     def _bracket_balance(self, line: str) -> int:
         """Count net opening brackets, ignoring those inside strings."""
-        balance = 0
-        in_string = False
-        string_char = None
-        prev = None
-
-        for char in line:
-            if in_string:
-                if char == string_char and prev != "\\":
-                    in_string = False
-            elif char in "\"'":
-                in_string, string_char = True, char
-            elif char in "([{":
-                balance += 1
-            elif char in ")]}":
-                balance -= 1
-            prev = char
-
-        return balance
+        groups = [m.lastindex for m in RE_BRACKETS.finditer(line)]
+        return groups.count(1) - groups.count(2)
 
     # --- Script Generation ---
 
@@ -290,15 +359,16 @@ print(f"Written: {filename}")'''
         """Generate a complete executable Python script from the notebook."""
         header = SCRIPT_HEADER.format(name=self.notebook_path.name, working_dir=self.working_dir)
 
-        cells = [
-            f"\n# {'═' * 3} Cell {cell.number} {'═' * 3}\n{self.transform_cell(cell)}"
+        cells = "\n".join(
+            f"{CELL_BANNER_START}{cell.number}{CELL_BANNER_END}{self.transform_cell(cell)}"
             for cell in self.extract_code_cells(skip_cells)
-        ]
+        )
 
-        return header + "\n".join(cells)
+        return header + cells
 
     def save_script(self, output_path: Path, skip_cells: list[int] | None = None) -> Path:
         """Generate and save the executable script."""
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(self.generate_script(skip_cells))
+        # Python reads source as UTF-8; don't depend on the locale encoding
+        output_path.write_bytes(self.generate_script(skip_cells).encode("utf-8"))
         return output_path
@@ -4,13 +4,29 @@ Configuration models using Pydantic for type-safe validation.
 
 from __future__ import annotations
 
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
 from enum import Enum
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional
 
 import yaml
 from pydantic import BaseModel, Field, field_validator
 
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C extension
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+
+@lru_cache(maxsize=4)
+def _load_yaml(path: str, mtime_ns: int, size: int) -> dict:
+    """Parse a YAML file; mtime and size only key the cache so edits are picked up."""
+    with open(path) as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
 
 class TestStatus(str, Enum):
     """Status of a notebook test execution."""
@@ -44,6 +60,7 @@ class CleanupConfig(BaseModel):
     """Configuration for Azure resource cleanup."""
     resource_groups: list[str] = Field(default_factory=list)
     purge_cognitive_services: bool = True
+    use_sdk: bool = True
 
 
 class Settings(BaseModel):
@@ -52,6 +69,9 @@ class Settings(BaseModel):
     output_dir: str = ".test-output"
     default_timeout_minutes: int = 30
     parallel_execution: bool = False
+    max_parallel: Optional[int] = Field(default=None, ge=1)
+    reuse_interpreters: bool = False
+    keep_scripts: bool = False
     stop_on_first_failure: bool = False
 
 
@@ -64,16 +84,59 @@ class TestConfig(BaseModel):
     @classmethod
     def from_yaml(cls, path: Path) -> TestConfig:
         """Load configuration from YAML file."""
-        with open(path) as f:
-            return cls(**yaml.safe_load(f))
+        stat = Path(path).stat()
+        return cls(**_load_yaml(str(path), stat.st_mtime_ns, stat.st_size))
+
+    @cached_property
+    def _by_name(self) -> dict[str, NotebookConfig]:
+        # First definition wins, as with the previous linear search
+        by_name: dict[str, NotebookConfig] = {}
+        for nb in self.notebooks:
+            by_name.setdefault(nb.name, nb)
+        return by_name
 
     def get_notebook(self, name: str) -> NotebookConfig | None:
         """Get notebook config by name."""
-        return next((nb for nb in self.notebooks if nb.name == name), None)
+        return self._by_name.get(name)
 
     def get_execution_order(self, target: str | None = None) -> list[NotebookConfig]:
         """Get notebooks in dependency-resolved execution order."""
-        return self._resolve_deps(target) if target else self._topo_sort()
+        return self._resolve_deps(target) if target else list(self._full_order)
+
+    def get_execution_layers(self, target: str | None = None) -> list[list[NotebookConfig]]:
+        """Group the execution order into layers whose notebooks only depend on earlier layers."""
+        notebooks = self.get_execution_order(target)
+        position = {nb.name: i for i, nb in enumerate(notebooks)}
+
+        # Kahn's algorithm; dependencies outside this run impose no ordering
+        indegree = {nb.name: 0 for nb in notebooks}
+        dependents: dict[str, list[NotebookConfig]] = defaultdict(list)
+        for nb in notebooks:
+            for dep in dict.fromkeys(nb.depends_on):
+                if dep in position:
+                    indegree[nb.name] += 1
+                    dependents[dep].append(nb)
+
+        layers, layer = [], [nb for nb in notebooks if indegree[nb.name] == 0]
+        while layer:
+            layers.append(layer)
+            ready = []
+            for nb in layer:
+                for child in dependents[nb.name]:
+                    indegree[child.name] -= 1
+                    if indegree[child.name] == 0:
+                        ready.append(child)
+            layer = sorted(ready, key=lambda nb: position[nb.name])
+
+        # Notebooks caught in a dependency cycle still run, after everything else
+        if leftover := [nb for nb in notebooks if indegree[nb.name] > 0]:
+            layers.append(leftover)
+        return layers
+
+    @cached_property
+    def _full_order(self) -> tuple[NotebookConfig, ...]:
+        # Sorted once per config; callers get a fresh list copy
+        return tuple(self._topo_sort())
 
     def _resolve_deps(self, target: str) -> list[NotebookConfig]:
         """Resolve all dependencies for a target notebook."""
@@ -113,7 +176,10 @@ class TestConfig(BaseModel):
         return result
 
 
-class CellResult(BaseModel):
+# Result models are plain dataclasses: they are built by the runner from trusted
+# values, so they skip the validation the config models need.
+@dataclass
+class CellResult:
     """Result of executing a single cell."""
     cell_number: int
     status: TestStatus
@@ -122,41 +188,54 @@ class CellResult(BaseModel):
     output: Optional[str] = None
 
 
-class NotebookResult(BaseModel):
+@dataclass
+class NotebookResult:
     """Result of executing a notebook."""
     name: str
     status: TestStatus
     duration_seconds: float = 0.0
-    cells: list[CellResult] = Field(default_factory=list)
+    cells: list[CellResult] = field(default_factory=list)
     error_message: Optional[str] = None
 
+    @property
+    def _counts(self) -> Counter[TestStatus]:
+        # One pass per read; cells may still be appended while the result is being built
+        return Counter(c.status for c in self.cells)
+
     @property
     def passed_cells(self) -> int:
-        return sum(1 for c in self.cells if c.status == TestStatus.PASSED)
+        return self._counts[TestStatus.PASSED]
 
     @property
     def failed_cells(self) -> int:
-        return sum(1 for c in self.cells if c.status == TestStatus.FAILED)
+        return self._counts[TestStatus.FAILED]
 
     @property
     def skipped_cells(self) -> int:
-        return sum(1 for c in self.cells if c.status == TestStatus.SKIPPED)
+        return self._counts[TestStatus.SKIPPED]
 
 
-class TestSuiteResult(BaseModel):
+@dataclass
+class TestSuiteResult:
     """Result of the entire test suite."""
     status: TestStatus = TestStatus.PENDING
     duration_seconds: float = 0.0
-    notebooks: list[NotebookResult] = Field(default_factory=list)
+    notebooks: list[NotebookResult] = field(default_factory=list)
+    generated_at: Optional[datetime] = None
+
+    @property
+    def _counts(self) -> Counter[TestStatus]:
+        # One pass per read; notebooks are appended as the run progresses
+        return Counter(n.status for n in self.notebooks)
 
     @property
     def passed(self) -> int:
-        return sum(1 for n in self.notebooks if n.status == TestStatus.PASSED)
+        return self._counts[TestStatus.PASSED]
 
     @property
     def failed(self) -> int:
-        return sum(1 for n in self.notebooks if n.status == TestStatus.FAILED)
+        return self._counts[TestStatus.FAILED]
 
     @property
     def skipped(self) -> int:
-        return sum(1 for n in self.notebooks if n.status == TestStatus.SKIPPED)
+        return self._counts[TestStatus.SKIPPED]
@@ -4,10 +4,21 @@ Test execution engine with rich console output.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import inspect
+import multiprocessing as mp
 import os
+import runpy
 import shutil
+import signal
 import subprocess
+import sys
 import time
+import traceback
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
 from pathlib import Path
 
 from rich.console import Console
@@ -29,6 +40,106 @@ PROGRESS_COLUMNS = (
     TimeElapsedColumn(),
 )
 
+# Summary table status cells, built once and shared by every row
+STATUS_CELLS = {status: Text(f"✗ {status.value}", style="red") for status in TestStatus}
+STATUS_CELLS[TestStatus.PASSED] = Text("✓ passed", style="green")
+
+# Imported once by the forkserver so every worker forked from it starts with them warm
+WORKER_PRELOAD = ("azure.identity", "azure.ai.projects", "openai")
+
+# Generated scripts are reused until the notebook (contents or location), its skip list, PATH or the extractor changes
+EXTRACTOR_SOURCE = Path(inspect.getfile(NotebookExtractor))
+
+# Scripts run under the runner's own interpreter rather than whatever "python" is first on PATH
+PYTHON = (sys.executable,)
+
+# Runs a script piped on stdin under its would-be path, with its source registered in
+# linecache, so tracebacks name the script and show the failing lines as if run from disk
+# (the default excepthook reads source files directly, hence the traceback-module hook,
+# which also drops this bootstrap's own frame)
+STDIN_BOOTSTRAP = """\
+import linecache, sys, traceback
+__file__ = sys.argv[1]
+_source = sys.stdin.read()
+linecache.cache[__file__] = (len(_source), None, _source.splitlines(True), __file__)
+sys.argv[:] = [__file__]
+sys.excepthook = lambda t, v, tb: traceback.print_exception(t, v, tb.tb_next or tb)
+exec(compile(_source, __file__, "exec"))
+"""
+
+# Failure messages keep only the end of the log, where the traceback is; the full log stays on disk
+ERROR_TAIL_BYTES = 4096
+
+
+def _hash_files(*paths: Path, extra: bytes = b"") -> str:
+    """Hash the contents of several files, reading them through one reusable buffer."""
+    digest = hashlib.blake2b(extra, digest_size=16)
+    buf = bytearray(1 << 16)
+    view = memoryview(buf)
+    for path in paths:
+        with open(path, "rb") as f:
+            while n := f.readinto(buf):
+                digest.update(view[:n])
+    return digest.hexdigest()
+
+
+def _read_tail(path: Path, size: int = ERROR_TAIL_BYTES) -> str:
+    """Read at most the last `size` bytes of a log file."""
+    with open(path, "rb") as f:
+        f.seek(max(0, os.fstat(f.fileno()).st_size - size))
+        return f.read().decode(errors="replace")
+
+
+class _ScriptTimeout(BaseException):
+    """Raised inside a pool worker when a script exceeds its timeout."""
+
+
+def _raise_timeout(signum, frame):
+    raise _ScriptTimeout
+
+
+def _exec_script(script_path: str, env: dict[str, str], cwd: str, timeout: int) -> int | None:
+    """Run a generated script inside a single-use worker; return its exit code, or None on timeout.
+
+    The script's stdout/stderr are redirected at the file-descriptor level into
+    stdout.log/stderr.log next to it, so subprocess output is captured too.
+    The worker exits after this one script, so nothing it changes (cwd,
+    environment, modules, monkeypatches) reaches another notebook.
+    """
+    script_dir = os.path.dirname(script_path)
+    os.chdir(cwd)
+    os.environ.clear()
+    os.environ.update(env)
+    sys.path[:0] = [script_dir, cwd]
+    sys.argv = [script_path]
+
+    with open(os.path.join(script_dir, "stdout.log"), "wb") as out, open(os.path.join(script_dir, "stderr.log"), "wb") as err:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(out.fileno(), 1)
+        os.dup2(err.fileno(), 2)
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.alarm(timeout)
+        try:
+            runpy.run_path(script_path, run_name="__main__")
+            returncode = 0
+        except _ScriptTimeout:
+            returncode = None
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                returncode = e.code or 0
+            else:
+                print(e.code, file=sys.stderr)
+                returncode = 1
+        except BaseException:
+            traceback.print_exc()
+            returncode = 1
+        finally:
+            signal.alarm(0)
+            sys.stdout.flush()
+            sys.stderr.flush()
+    return returncode
+
 
 class TestRunner:
     """Executes notebook tests with rich progress display."""
@@ -38,100 +149,258 @@ class TestRunner:
         self.output_dir = config.settings.workspace_root / config.settings.output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self._deps_installed = False
+        self._prepared: dict[str, Future] = {}
+        # Snapshot of the environment, copied and extended per notebook
+        self._base_env = dict(os.environ)
+        self._base_pythonpath = os.environ.get("PYTHONPATH", "")
 
     def run_all(self, target: str | None = None) -> TestSuiteResult:
         """Run all notebooks (or dependencies of target)."""
-        return self._execute(self.config.get_execution_order(target))
+        return self._execute(target)
 
     def run_notebook(self, name: str) -> TestSuiteResult:
         """Run a single notebook by name (with dependencies)."""
-        return self._execute(self.config.get_execution_order(name))
+        return self._execute(name)
 
-    def _execute(self, notebooks: list[NotebookConfig]) -> TestSuiteResult:
+    def _execute(self, target: str | None) -> TestSuiteResult:
         """Core execution loop for notebook tests."""
+        notebooks = self.config.get_execution_order(target)
         self._ensure_dependencies()
         result = TestSuiteResult()
         start = time.perf_counter()
 
+        # Extract every script up front and concurrently; the run loop then only launches interpreters
+        with ThreadPoolExecutor(max_workers=min(len(notebooks), os.cpu_count() or 1) or 1) as pool:
+            self._prepared = {nb.name: pool.submit(self._prepare_notebook, nb) for nb in notebooks}
+
         self._print_header(len(notebooks))
 
-        with Progress(*PROGRESS_COLUMNS, console=console) as progress:
+        # The bar disappears when done; per-notebook lines are printed once it has closed
+        with Progress(*PROGRESS_COLUMNS, console=console, refresh_per_second=4, transient=True) as progress:
             task = progress.add_task("Running", total=len(notebooks))
 
-            for nb in notebooks:
-                progress.update(task, description=f"[bold blue]{nb.name}")
-                nb_result = self._run_notebook(nb)
-                result.notebooks.append(nb_result)
-                progress.advance(task)
-
-                self._print_result(nb_result)
+            if self.config.settings.parallel_execution:
+                asyncio.run(self._execute_parallel(self.config.get_execution_layers(target), result, progress, task))
+            else:
+                self._execute_sequential(notebooks, result, progress, task)
 
-                if nb_result.status == TestStatus.FAILED and self.config.settings.stop_on_first_failure:
-                    break
+        for nb_result in result.notebooks:
+            self._print_result(nb_result)
 
         result.duration_seconds = time.perf_counter() - start
         result.status = TestStatus.PASSED if result.failed == 0 else TestStatus.FAILED
+        result.generated_at = datetime.utcnow()
         self._print_summary(result)
         return result
 
-    def _run_notebook(self, nb: NotebookConfig) -> NotebookResult:
-        """Execute a single notebook's generated script."""
-        start = time.perf_counter()
+    def _execute_sequential(self, notebooks: list[NotebookConfig], result: TestSuiteResult, progress: Progress, task) -> None:
+        """Run notebooks one after another in dependency order."""
+        for nb in notebooks:
+            progress.update(task, description=f"[bold blue]{nb.name}")
+            nb_result = self._run_notebook(nb)
+            result.notebooks.append(nb_result)
+            progress.advance(task)
+
+            if nb_result.status == TestStatus.FAILED and self.config.settings.stop_on_first_failure:
+                break
+
+    async def _execute_parallel(self, layers: list[list[NotebookConfig]], result: TestSuiteResult, progress: Progress, task) -> None:
+        """Run each dependency layer concurrently, layers one after another."""
+        semaphore = asyncio.Semaphore(self.config.settings.max_parallel or os.cpu_count() or 1)
+        stop = asyncio.Event()
+
+        async def run_one(nb: NotebookConfig) -> NotebookResult | None:
+            async with semaphore:
+                if stop.is_set():
+                    return None
+                nb_result = await self._run_notebook_async(nb)
+            progress.advance(task)
+            if nb_result.status == TestStatus.FAILED and self.config.settings.stop_on_first_failure:
+                stop.set()
+            return nb_result
+
+        for layer in layers:
+            if stop.is_set():
+                break
+            progress.update(task, description=f"[bold blue]{', '.join(nb.name for nb in layer)}")
+            # Record results in layer (dependency/config) order, not completion order
+            layer_results = await asyncio.gather(*(run_one(nb) for nb in layer))
+            result.notebooks.extend(r for r in layer_results if r is not None)
+
+    @staticmethod
+    def _run_in_worker(script_path: Path, env: dict[str, str], cwd: Path, timeout: int) -> int | None:
+        """Run a script in a fresh worker forked from the preloaded forkserver (see _exec_script)."""
+        ctx = mp.get_context("forkserver")
+        ctx.set_forkserver_preload([__name__, *WORKER_PRELOAD])
+        # A single-use pool per notebook: a worker that crashes or calls os._exit breaks
+        # only this pool, so the failure is recorded against this notebook alone
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            return pool.submit(_exec_script, str(script_path), env, str(cwd), timeout).result()
+
+    def _prepare_notebook(self, nb: NotebookConfig) -> tuple[Path, str | None, dict[str, str], Path]:
+        """Generate the notebook's script and helpers; return (script path, source, env, cwd).
+
+        Unless scripts are kept on disk (keep_scripts, or the interpreter pool
+        which runs them by path), the script is returned as source to pipe into
+        ``python -`` and nothing is written; otherwise source is None.
+        """
         notebook_path = self.config.settings.workspace_root / nb.path
         script_dir = self.output_dir / nb.name
-
-        try:
-            # Generate executable script
-            script_path = script_dir / f"{nb.name.replace('-', '_')}.py"
-            NotebookExtractor(notebook_path).save_script(script_path, nb.skip_cells)
-
-            # Copy helper modules
-            for py_file in notebook_path.parent.glob("*.py"):
-                if py_file.name != "__init__.py":
-                    shutil.copy2(py_file, script_dir / py_file.name)
-
-            # Build environment
-            env = {
-                **os.environ,
-                **nb.env_vars,
-                "PYTHONPATH": f"{script_dir}:{notebook_path.parent}:{os.environ.get('PYTHONPATH', '')}",
-            }
-
-            # Execute
-            proc = subprocess.run(
-                ["python", str(script_path)],
-                capture_output=True,
-                text=True,
-                timeout=nb.timeout_minutes * 60,
-                env=env,
-                cwd=notebook_path.parent,
-            )
-
-            # Save logs
-            (script_dir / "stdout.log").write_text(proc.stdout)
-            (script_dir / "stderr.log").write_text(proc.stderr)
-
-            if proc.returncode == 0:
-                return NotebookResult(
-                    name=nb.name,
-                    status=TestStatus.PASSED,
-                    duration_seconds=time.perf_counter() - start,
-                )
-
+        script_dir.mkdir(parents=True, exist_ok=True)
+        script_path = script_dir / f"{nb.name.replace('-', '_')}.py"
+
+        source = None
+        if self.config.settings.keep_scripts or self.config.settings.reuse_interpreters:
+            # Generate executable script, unless the one from a previous run is still current
+            key_path = script_dir / ".cache_key"
+            # The script hard-codes the notebook's folder, and shell lines are only exec'd
+            # directly when PATH resolves them, so both are part of the key
+            extra = f"{notebook_path}\0{nb.skip_cells!r}\0{self._base_env.get('PATH', '')}"
+            key = _hash_files(notebook_path, EXTRACTOR_SOURCE, extra=extra.encode())
+            if not (script_path.exists() and key_path.exists() and key_path.read_text() == key):
+                NotebookExtractor(notebook_path).save_script(script_path, nb.skip_cells)
+                key_path.write_text(key)
+        else:
+            source = NotebookExtractor(notebook_path).generate_script(nb.skip_cells)
+
+        # Link helper modules (copy across filesystems) that are new or changed since the last run
+        for py_file in notebook_path.parent.glob("*.py"):
+            if py_file.name == "__init__.py":
+                continue
+            dst = script_dir / py_file.name
+            if dst.exists() and (dst.samefile(py_file) or py_file.stat().st_mtime <= dst.stat().st_mtime):
+                continue
+            dst.unlink(missing_ok=True)
+            try:
+                os.link(py_file, dst)
+            except OSError:
+                shutil.copy2(py_file, dst)
+
+        # Build environment
+        env = self._base_env.copy()
+        env.update(nb.env_vars)
+        env["PYTHONPATH"] = f"{script_dir}:{notebook_path.parent}:{self._base_pythonpath}"
+        return script_path, source, env, notebook_path.parent
+
+    def _take_prepared(self, nb: NotebookConfig) -> tuple[Path, str | None, dict[str, str], Path]:
+        """Return the notebook's pre-extracted script (re-raising any extraction error), preparing it if needed."""
+        future = self._prepared.pop(nb.name, None)
+        return future.result() if future else self._prepare_notebook(nb)
+
+    @staticmethod
+    def _launch_args(script_path: Path, source: str | None) -> tuple[list[str], bytes | None]:
+        """Return the interpreter argv and stdin bytes: the saved script, or source piped to STDIN_BOOTSTRAP."""
+        if source is None:
+            return [*PYTHON, str(script_path)], None
+        return [*PYTHON, "-c", STDIN_BOOTSTRAP, str(script_path)], source.encode("utf-8")
+
+    def _notebook_result(self, nb: NotebookConfig, start: float, returncode: int | None) -> NotebookResult:
+        """Build a finished script's result from its exit code (None on timeout) and logs."""
+        if returncode is None:
+            return self._timeout_result(nb, start)
+
+        if returncode == 0:
             return NotebookResult(
                 name=nb.name,
-                status=TestStatus.FAILED,
+                status=TestStatus.PASSED,
                 duration_seconds=time.perf_counter() - start,
-                error_message=proc.stderr or proc.stdout,
             )
 
+        script_dir = self.output_dir / nb.name
+        return NotebookResult(
+            name=nb.name,
+            status=TestStatus.FAILED,
+            duration_seconds=time.perf_counter() - start,
+            error_message=_read_tail(script_dir / "stderr.log") or _read_tail(script_dir / "stdout.log"),
+        )
+
+    def _timeout_result(self, nb: NotebookConfig, start: float) -> NotebookResult:
+        """Build the failed result of a script that ran past its timeout."""
+        return NotebookResult(
+            name=nb.name,
+            status=TestStatus.FAILED,
+            duration_seconds=time.perf_counter() - start,
+            error_message=f"Timeout after {nb.timeout_minutes} minutes",
+        )
+
+    def _worker_died_result(self, nb: NotebookConfig, start: float) -> NotebookResult:
+        """Build the failed result of a script whose worker process died (crash or os._exit)."""
+        stderr_log = self.output_dir / nb.name / "stderr.log"
+        output = _read_tail(stderr_log) if stderr_log.exists() else ""
+        return NotebookResult(
+            name=nb.name,
+            status=TestStatus.FAILED,
+            duration_seconds=time.perf_counter() - start,
+            error_message=f"Worker process terminated abruptly\n{output}".rstrip(),
+        )
+
+    def _run_notebook(self, nb: NotebookConfig) -> NotebookResult:
+        """Execute a single notebook's generated script."""
+        start = time.perf_counter()
+
+        try:
+            script_path, source, env, cwd = self._take_prepared(nb)
+
+            if self.config.settings.reuse_interpreters:
+                return self._notebook_result(nb, start, self._run_in_worker(script_path, env, cwd, nb.timeout_minutes * 60))
+
+            # Execute, with output going straight into the log files
+            argv, stdin = self._launch_args(script_path, source)
+            with open(script_path.parent / "stdout.log", "wb") as out, open(script_path.parent / "stderr.log", "wb") as err:
+                proc = subprocess.run(
+                    argv,
+                    input=stdin,
+                    stdout=out,
+                    stderr=err,
+                    timeout=nb.timeout_minutes * 60,
+                    env=env,
+                    cwd=cwd,
+                )
+            return self._notebook_result(nb, start, proc.returncode)
+
         except subprocess.TimeoutExpired:
+            return self._timeout_result(nb, start)
+        except BrokenProcessPool:
+            return self._worker_died_result(nb, start)
+        except Exception as e:
             return NotebookResult(
                 name=nb.name,
                 status=TestStatus.FAILED,
                 duration_seconds=time.perf_counter() - start,
-                error_message=f"Timeout after {nb.timeout_minutes} minutes",
+                error_message=str(e),
             )
+
+    async def _run_notebook_async(self, nb: NotebookConfig) -> NotebookResult:
+        """Execute a single notebook's generated script without blocking the event loop."""
+        start = time.perf_counter()
+
+        try:
+            script_path, source, env, cwd = self._take_prepared(nb)
+
+            if self.config.settings.reuse_interpreters:
+                returncode = await asyncio.to_thread(self._run_in_worker, script_path, env, cwd, nb.timeout_minutes * 60)
+                return self._notebook_result(nb, start, returncode)
+
+            argv, stdin = self._launch_args(script_path, source)
+            with open(script_path.parent / "stdout.log", "wb") as out, open(script_path.parent / "stderr.log", "wb") as err:
+                proc = await asyncio.create_subprocess_exec(
+                    *argv,
+                    stdin=None if stdin is None else asyncio.subprocess.PIPE,
+                    stdout=out,
+                    stderr=err,
+                    env=env,
+                    cwd=cwd,
+                )
+                try:
+                    await asyncio.wait_for(proc.communicate(stdin), timeout=nb.timeout_minutes * 60)
+                except asyncio.TimeoutError:
+                    proc.kill()
+                    await proc.wait()
+                    return self._timeout_result(nb, start)
+            return self._notebook_result(nb, start, proc.returncode)
+
+        except BrokenProcessPool:
+            return self._worker_died_result(nb, start)
         except Exception as e:
             return NotebookResult(
                 name=nb.name,
@@ -149,14 +418,22 @@ class TestRunner:
         if not req_file.exists():
             return
 
+        # Skip pip entirely when this interpreter already installed this requirements file
+        marker = self.output_dir / f".deps-installed-{_hash_files(req_file, extra=sys.executable.encode())}"
+        if marker.exists():
+            self._deps_installed = True
+            return
+
         console.print("[dim]Installing test dependencies...[/dim]")
         result = subprocess.run(
-            ["pip", "install", "-q", "-r", str(req_file)],
+            [*PYTHON, "-m", "pip", "install", "-q", "-r", str(req_file)],
             capture_output=True,
             text=True,
         )
         if result.returncode != 0:
             console.print(f"[yellow]Warning: {result.stderr}[/yellow]")
+        else:
+            marker.touch()
 
         self._deps_installed = True
 
@@ -189,12 +466,7 @@ class TestRunner:
         table.add_column("Duration", justify="right")
 
         for nb in result.notebooks:
-            passed = nb.status == TestStatus.PASSED
-            table.add_row(
-                nb.name,
-                Text(f"{'✓' if passed else '✗'} {nb.status.value}", style="green" if passed else "red"),
-                f"{nb.duration_seconds:.1f}s",
-            )
+            table.add_row(nb.name, STATUS_CELLS[nb.status], f"{nb.duration_seconds:.1f}s")
 
         console.print(table)
         console.print()